@@ -20,10 +20,9 @@ from .timm_utils import extract_timm_shapes_from_config, get_timm_model_creator,
 from .transformers_utils import (
     PretrainedProcessor,
     extract_transformers_shapes_from_artifacts,
+    get_shared_transformers_artifacts,
     get_transformers_auto_model_class_for_task,
-    get_transformers_generation_config,
-    get_transformers_pretrained_config,
-    get_transformers_pretrained_processor,
+    load_transformers_artifacts,
 )
 
 if is_torch_available():
@@ -79,11 +78,18 @@ class Backend(Generic[BackendConfigT], ABC):
         else:
             self.logger.info("\t+ Benchmarking a Transformers model")
             self.automodel_loader = get_transformers_auto_model_class_for_task(self.config.task, self.config.model_type)
-            self.generation_config = get_transformers_generation_config(self.config.model, **self.config.model_kwargs)
-            self.pretrained_config = get_transformers_pretrained_config(self.config.model, **self.config.model_kwargs)
-            self.pretrained_processor = get_transformers_pretrained_processor(
-                self.config.processor, **self.config.processor_kwargs
+            artifacts_args = (
+                self.config.model,
+                self.config.processor,
+                self.config.model_kwargs,
+                self.config.processor_kwargs,
             )
+            artifacts = get_shared_transformers_artifacts(*artifacts_args)
+            if artifacts is not None:
+                self.logger.info("\t+ Using Transformers artifacts shared by the main process")
+            else:
+                artifacts = load_transformers_artifacts(*artifacts_args)
+            self.generation_config, self.pretrained_config, self.pretrained_processor = artifacts
             self.model_shapes = extract_transformers_shapes_from_artifacts(
                 self.pretrained_config, self.pretrained_processor
             )
@@ -1,3 +1,4 @@
+import os
 import shutil
 from pathlib import Path
 from tempfile import TemporaryDirectory
@@ -12,6 +13,31 @@ from ...task_utils import TEXT_EMBEDDING_TASKS, TEXT_GENERATION_TASKS
 from ..base import Backend
 from ..transformers_utils import fast_weights_init
 from .config import PyTXIConfig
+from .utils import get_weights_files, prefetch_files
+
+TXI_FIELDS = (
+    "gpus",
+    "image",
+    "ports",
+    "volumes",
+    "devices",
+    "shm_size",
+    "environment",
+    "connection_timeout",
+    "first_request_timeout",
+    "max_concurrent_requests",
+)
+TEI_FIELDS = ("dtype", "pooling")
+TGI_FIELDS = (
+    "dtype",
+    "sharded",
+    "quantize",
+    "num_shard",
+    "speculate",
+    "cuda_graphs",
+    "trust_remote_code",
+    "disable_custom_kernels",
+)
 
 
 class PyTXIBackend(Backend[PyTXIConfig]):
@@ -42,7 +68,13 @@ class PyTXIBackend(Backend[PyTXIConfig]):
             shutil.rmtree(self.tmpdir.name, ignore_errors=True)
 
     def download_pretrained_model(self) -> None:
-        model_snapshot_folder = snapshot_download(self.config.model, **self.config.model_kwargs)
+        model_snapshot_folder = snapshot_download(
+            self.config.model, **{"max_workers": min(16, os.cpu_count() or 1), **self.config.model_kwargs}
+        )
+
+        if self.config.prefetch_weights:
+            self.logger.info("\t+ Prefetching pretrained model's weights into page cache")
+            prefetch_files(get_weights_files(model_snapshot_folder))
 
         if self.config.task in TEXT_GENERATION_TASKS:
             self.generation_config.eos_token_id = None
@@ -51,6 +83,8 @@ class PyTXIBackend(Backend[PyTXIConfig]):
 
     def create_no_weights_model(self) -> None:
         model_path = Path(hf_hub_download(self.config.model, filename="config.json", cache_dir=self.tmpdir.name)).parent
+        # from_pretrained refuses a directory without weights, this placeholder is overwritten by the randomly initialized
+        # model's weights below
         save_model(model=torch.nn.Linear(1, 1), filename=model_path / "model.safetensors", metadata={"format": "pt"})
 
         self.pretrained_processor.save_pretrained(save_directory=model_path)
@@ -92,81 +126,15 @@ class PyTXIBackend(Backend[PyTXIConfig]):
 
     @property
     def txi_kwargs(self):
-        kwargs = {}
-
-        if self.config.gpus is not None:
-            kwargs["gpus"] = self.config.gpus
-
-        if self.config.image is not None:
-            kwargs["image"] = self.config.image
-
-        if self.config.ports is not None:
-            kwargs["ports"] = self.config.ports
-
-        if self.config.volumes is not None:
-            kwargs["volumes"] = self.config.volumes
-
-        if self.config.devices is not None:
-            kwargs["devices"] = self.config.devices
-
-        if self.config.shm_size is not None:
-            kwargs["shm_size"] = self.config.shm_size
-
-        if self.config.environment is not None:
-            kwargs["environment"] = self.config.environment
-
-        if self.config.connection_timeout is not None:
-            kwargs["connection_timeout"] = self.config.connection_timeout
-
-        if self.config.first_request_timeout is not None:
-            kwargs["first_request_timeout"] = self.config.first_request_timeout
-
-        if self.config.max_concurrent_requests is not None:
-            kwargs["max_concurrent_requests"] = self.config.max_concurrent_requests
-
-        return kwargs
+        return {field: value for field in TXI_FIELDS if (value := getattr(self.config, field)) is not None}
 
     @property
     def tei_kwargs(self):
-        kwargs = {}
-
-        if self.config.dtype is not None:
-            kwargs["dtype"] = self.config.dtype
-
-        if self.config.pooling is not None:
-            kwargs["pooling"] = self.config.pooling
-
-        return kwargs
+        return {field: value for field in TEI_FIELDS if (value := getattr(self.config, field)) is not None}
 
     @property
     def tgi_kwargs(self):
-        kwargs = {}
-
-        if self.config.dtype is not None:
-            kwargs["dtype"] = self.config.dtype
-
-        if self.config.sharded is not None:
-            kwargs["sharded"] = self.config.sharded
-
-        if self.config.quantize is not None:
-            kwargs["quantize"] = self.config.quantize
-
-        if self.config.num_shard is not None:
-            kwargs["num_shard"] = self.config.num_shard
-
-        if self.config.speculate is not None:
-            kwargs["speculate"] = self.config.speculate
-
-        if self.config.cuda_graphs is not None:
-            kwargs["cuda_graphs"] = self.config.cuda_graphs
-
-        if self.config.trust_remote_code is not None:
-            kwargs["trust_remote_code"] = self.config.trust_remote_code
-
-        if self.config.disable_custom_kernels is not None:
-            kwargs["disable_custom_kernels"] = self.config.disable_custom_kernels
-
-        return kwargs
+        return {field: value for field in TGI_FIELDS if (value := getattr(self.config, field)) is not None}
 
     def prepare_inputs(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
         if self.config.task in TEXT_GENERATION_TASKS:
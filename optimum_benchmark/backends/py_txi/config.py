@@ -16,6 +16,9 @@ class PyTXIConfig(BackendConfig):
 
     # optimum-benchmark specific
     no_weights: bool = False
+    # read the pretrained weights into the page cache before starting the container, off by default since it
+    # competes with the container for memory on hosts with less RAM than the model
+    prefetch_weights: bool = False
 
     # Image to use for the container
     image: Optional[str] = None
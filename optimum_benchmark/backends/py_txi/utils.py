@@ -0,0 +1,36 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, List, Union
+
+
+def get_weights_files(folder: Union[str, Path]) -> List[str]:
+    files = [os.path.join(root, file) for root, _, files in os.walk(folder, followlinks=True) for file in files]
+    safetensors_files = [file for file in files if file.endswith(".safetensors")]
+
+    # TXI only loads one format, preferring safetensors, so .bin files are only returned when there's no safetensors
+    if len(safetensors_files) > 0:
+        return safetensors_files
+
+    return [file for file in files if file.endswith(".bin")]
+
+
+def prefetch_file(path: Union[str, Path]) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        # asks the kernel to read the file into the page cache, unlike mmap + MAP_POPULATE the pages are not mapped
+        # (and charged) to this process, so the benchmark's own memory measurements are left untouched
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    finally:
+        os.close(fd)
+
+
+def prefetch_files(paths: Iterable[Union[str, Path]], max_workers: int = 8) -> None:
+    paths = list(paths)
+
+    if len(paths) == 0 or not hasattr(os, "posix_fadvise"):
+        # posix_fadvise is only available on Unix
+        return
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(paths))) as executor:
+        list(executor.map(prefetch_file, paths))
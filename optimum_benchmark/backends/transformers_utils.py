@@ -1,6 +1,13 @@
+import atexit
+import json
+import os
+import pickle
 from contextlib import contextmanager
-from typing import Any, Dict, Optional, Type, Union
+from logging import getLogger
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, List, Optional, Tuple, Type, Union
 
+import huggingface_hub
 import torch
 import transformers
 from torch import Tensor
@@ -21,6 +28,8 @@ from transformers import (
 
 from ..task_utils import TASKS_TO_AUTO_MODEL_CLASS_NAMES, map_from_synonym_task
 
+LOGGER = getLogger("transformers_utils")
+
 
 def get_transformers_auto_model_class_for_task(task: str, model_type: Optional[str] = None) -> Type["AutoModel"]:
     task = map_from_synonym_task(task)
@@ -45,6 +54,37 @@ def get_transformers_auto_model_class_for_task(task: str, model_type: Optional[s
 PretrainedProcessor = Union["FeatureExtractionMixin", "ImageProcessingMixin", "SpecialTokensMixin", "ProcessorMixin"]
 
 
+# configs, processor/tokenizer files (including tokenizer assets like Marian's source.spm/target.spm) and remote code,
+# but none of the weights or other large files a repo may contain
+METADATA_ALLOW_PATTERNS = ["*.json", "*.txt", "*.model", "*.spm", "*.tiktoken", "*.py", "*.jinja", "merges*", "vocab*"]
+
+
+def get_transformers_metadata_snapshot(model: str, **kwargs) -> str:
+    # fetches all the configs, processor and tokenizer files of a hub repo in a single (concurrent) snapshot
+    # so that they can be loaded from a local directory instead of each loader resolving them on the hub
+    if os.path.isdir(model):
+        return model
+
+    if kwargs.get("trust_remote_code", False):
+        # transformers only prefixes a remote code artifact's auto_map with its repo id when it's loaded from the hub,
+        # without it, the saved no weights model would look for the modeling code in its own (empty) directory
+        return model
+
+    try:
+        return huggingface_hub.snapshot_download(
+            model,
+            allow_patterns=METADATA_ALLOW_PATTERNS,
+            revision=kwargs.get("revision", None),
+            cache_dir=kwargs.get("cache_dir", None),
+            token=kwargs.get("token", None),
+            # only resolves the snapshot from the cache, without any request to the hub
+            local_files_only=kwargs.get("local_files_only", False),
+            max_workers=8,
+        )
+    except Exception:
+        return model
+
+
 def get_transformers_pretrained_config(model: str, **kwargs) -> "PretrainedConfig":
     # sometimes contains information about the model's input shapes that are not available in the config
     return AutoConfig.from_pretrained(model, **kwargs)
@@ -58,33 +98,183 @@ def get_transformers_generation_config(model: str, **kwargs) -> Optional["Genera
         return GenerationConfig()
 
 
-def get_transformers_pretrained_processor(model: str, **kwargs) -> Optional["PretrainedProcessor"]:
+PROCESSOR_FILES = ("processor_config.json", "chat_template.json")
+PREPROCESSOR_FILES = ("preprocessor_config.json",)
+TOKENIZER_FILES_PREFIXES = ("tokenizer", "vocab", "merges", "spiece", "sentencepiece", "special_tokens_map")
+
+
+def get_repo_filenames(model: str, **kwargs) -> Optional[List[str]]:
+    subfolder = kwargs.get("subfolder", "") or ""
+
     try:
-        # sometimes contains information about the model's input shapes that are not available in the config
-        return AutoProcessor.from_pretrained(model, **kwargs)
+        if os.path.isdir(model):
+            filenames = os.listdir(os.path.join(model, subfolder))
+        else:
+            filenames = huggingface_hub.list_repo_files(
+                model, revision=kwargs.get("revision", None), token=kwargs.get("token", None)
+            )
+            if subfolder:
+                prefix = subfolder.rstrip("/") + "/"
+                filenames = [filename[len(prefix) :] for filename in filenames if filename.startswith(prefix)]
     except Exception:
+        return None
+
+    return [filename for filename in filenames if "/" not in filename]
+
+
+def get_transformers_pretrained_processor(
+    model: str, pretrained_config: Optional["PretrainedConfig"] = None, **kwargs
+) -> Optional["PretrainedProcessor"]:
+    # a single file listing tells us which auto class can load the processor,
+    # instead of letting each auto class fail on the missing files one after the other
+    filenames = get_repo_filenames(model, **kwargs)
+
+    if filenames is None:
+        auto_classes = [AutoProcessor, AutoFeatureExtractor, AutoImageProcessor, AutoTokenizer]
+    else:
+        has_processor = any(filename in PROCESSOR_FILES for filename in filenames)
+        has_preprocessor = any(filename in PREPROCESSOR_FILES for filename in filenames)
+        has_tokenizer = any(filename.startswith(TOKENIZER_FILES_PREFIXES) for filename in filenames)
+
+        auto_classes = []
+        if has_processor or (has_preprocessor and has_tokenizer):
+            auto_classes.append(AutoProcessor)
+        if has_preprocessor:
+            auto_classes.extend([AutoImageProcessor, AutoFeatureExtractor])
+        if has_tokenizer:
+            auto_classes.append(AutoTokenizer)
+
+    for auto_class in auto_classes:
+        auto_class_kwargs = kwargs
+        if pretrained_config is not None and auto_class is not AutoProcessor and "config" not in kwargs:
+            # the model's config is already loaded, this saves the auto class from loading it again to find
+            # the class to instantiate (AutoProcessor forwards its kwargs to its components so we leave it out)
+            auto_class_kwargs = {"config": pretrained_config, **kwargs}
+
         try:
-            return AutoFeatureExtractor.from_pretrained(model, **kwargs)
+            # sometimes contains information about the model's input shapes that are not available in the config
+            return auto_class.from_pretrained(model, **auto_class_kwargs)
         except Exception:
-            try:
-                return AutoImageProcessor.from_pretrained(model, **kwargs)
-            except Exception:
-                try:
-                    return AutoTokenizer.from_pretrained(model, **kwargs)
-                except Exception:
-                    return None
+            continue
+
+    return None
+
+
+TransformersArtifacts = Tuple["GenerationConfig", "PretrainedConfig", Optional["PretrainedProcessor"]]
+
+
+def load_transformers_artifacts(
+    model: str, processor: str, model_kwargs: Dict[str, Any], processor_kwargs: Dict[str, Any]
+) -> TransformersArtifacts:
+    model_snapshot = get_transformers_metadata_snapshot(model, **model_kwargs)
+    if processor == model:
+        processor_snapshot = model_snapshot
+    else:
+        processor_snapshot = get_transformers_metadata_snapshot(processor, **processor_kwargs)
+
+    generation_config = get_transformers_generation_config(model_snapshot, **model_kwargs)
+    pretrained_config = get_transformers_pretrained_config(model_snapshot, **model_kwargs)
+    pretrained_processor = get_transformers_pretrained_processor(
+        processor_snapshot,
+        # the processor can only reuse the model's config if it's loaded from the same repo with the same kwargs
+        pretrained_config=pretrained_config
+        if (processor_snapshot, processor_kwargs) == (model_snapshot, model_kwargs)
+        else None,
+        **processor_kwargs,
+    )
+
+    return generation_config, pretrained_config, pretrained_processor
+
+
+SHARED_ARTIFACTS_ENV = "SHARED_TRANSFORMERS_ARTIFACTS"
+SHARED_ARTIFACTS: Dict[str, SharedMemory] = {}
+
+
+def get_transformers_artifacts_key(
+    model: str, processor: str, model_kwargs: Dict[str, Any], processor_kwargs: Dict[str, Any]
+) -> str:
+    return json.dumps([model, processor, model_kwargs, processor_kwargs], sort_keys=True, default=str)
+
+
+def share_transformers_artifacts(
+    model: str, processor: str, model_kwargs: Dict[str, Any], processor_kwargs: Dict[str, Any]
+) -> Optional[str]:
+    """
+    Loads the transformers artifacts once in the main process and pickles them into a shared memory block
+    (kept alive for the main process lifetime) so that isolated processes unpickle them instead of loading them.
+    Returns the shared memory block's name or None if the artifacts couldn't be shared.
+    """
+    key = get_transformers_artifacts_key(model, processor, model_kwargs, processor_kwargs)
+
+    if key not in SHARED_ARTIFACTS:
+        try:
+            artifacts = load_transformers_artifacts(model, processor, model_kwargs, processor_kwargs)
+            data = pickle.dumps((key, artifacts), protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            LOGGER.warning(f"\t+ Could not share transformers artifacts with isolated processes: {e}")
+            return None
+
+        shared_memory = SharedMemory(create=True, size=len(data))
+        shared_memory.buf[: len(data)] = data
+        SHARED_ARTIFACTS[key] = shared_memory
+
+    return SHARED_ARTIFACTS[key].name
+
+
+def get_shared_transformers_artifacts(
+    model: str, processor: str, model_kwargs: Dict[str, Any], processor_kwargs: Dict[str, Any]
+) -> Optional[TransformersArtifacts]:
+    name = os.environ.get(SHARED_ARTIFACTS_ENV, None)
+
+    if name is None:
+        return None
+
+    try:
+        shared_memory = SharedMemory(name=name)
+        try:
+            key, artifacts = pickle.loads(shared_memory.buf)
+        finally:
+            shared_memory.close()
+    except Exception as e:
+        # e.g. the segment is gone, or an artifact can't be unpickled in this process, so we load them instead
+        LOGGER.warning(f"\t+ Could not use transformers artifacts shared by the main process: {e}")
+        return None
+
+    if key != get_transformers_artifacts_key(model, processor, model_kwargs, processor_kwargs):
+        return None
+
+    return artifacts
+
+
+@atexit.register
+def release_shared_transformers_artifacts() -> None:
+    for shared_memory in SHARED_ARTIFACTS.values():
+        shared_memory.close()
+        shared_memory.unlink()
+
+    SHARED_ARTIFACTS.clear()
 
 
 def get_flat_dict(d: Dict[str, Any]) -> Dict[str, Any]:
     flat_dict = {}
-    for k, v in d.items():
-        if isinstance(v, dict):
-            flat_dict.update(get_flat_dict(v))
-        else:
+    # a stack of iterators walks nested dicts without recursion while keeping the same key override order
+    stack = [iter(d.items())]
+    while stack:
+        for k, v in stack[-1]:
+            if isinstance(v, dict):
+                stack.append(iter(v.items()))
+                break
             flat_dict[k] = v
+        else:
+            stack.pop()
     return flat_dict
 
 
+def get_config_attributes(config: "PretrainedConfig") -> Dict[str, Any]:
+    # like PretrainedConfig.to_dict (sub-configs become nested dicts) but without deep copying the whole config
+    return {k: get_config_attributes(v) if isinstance(v, PretrainedConfig) else v for k, v in vars(config).items()}
+
+
 def get_flat_artifact_dict(artifact: Union["PretrainedConfig", "PretrainedProcessor"]) -> Dict[str, Any]:
     artifact_dict = {}
 
@@ -94,6 +284,14 @@ def get_flat_artifact_dict(artifact: Union["PretrainedConfig", "PretrainedProces
         )
         for attribute in artifact.attributes:
             artifact_dict.update(get_flat_artifact_dict(getattr(artifact, attribute)))
+    elif isinstance(artifact, PretrainedConfig):
+        artifact_dict.update(
+            {
+                k: v
+                for k, v in get_config_attributes(artifact).items()
+                if isinstance(v, (int, str, float, bool, list, tuple, dict))
+            }
+        )
     elif hasattr(artifact, "to_dict"):
         artifact_dict.update(
             {k: v for k, v in artifact.to_dict().items() if isinstance(v, (int, str, float, bool, list, tuple, dict))}
@@ -108,6 +306,52 @@ def get_flat_artifact_dict(artifact: Union["PretrainedConfig", "PretrainedProces
     return artifact_dict
 
 
+def get_image_shapes(image_size: Any) -> Dict[str, Any]:
+    if isinstance(image_size, (int, float)):
+        return {"height": image_size, "width": image_size}
+    elif isinstance(image_size, (list, tuple)):
+        return {"height": image_size[0], "width": image_size[0]}
+    elif isinstance(image_size, dict) and len(image_size) == 2:
+        return {"height": list(image_size.values())[0], "width": list(image_size.values())[1]}
+    elif isinstance(image_size, dict) and len(image_size) == 1:
+        return {"height": list(image_size.values())[0], "width": list(image_size.values())[0]}
+    else:
+        return {}
+
+
+def get_shape(shape: str):
+    return lambda value: {shape: value}
+
+
+# each entry lists alternative artifact keys by priority, only the first one found is used,
+# entries are applied in order so later entries override the shapes extracted by earlier ones
+SHAPES_EXTRACTORS = (
+    # text input
+    (("vocab_size", get_shape("vocab_size")),),
+    (("type_vocab_size", get_shape("type_vocab_size")),),
+    (
+        ("max_position_embeddings", get_shape("max_position_embeddings")),
+        ("n_positions", get_shape("max_position_embeddings")),
+    ),
+    # image input
+    (("num_channels", get_shape("num_channels")),),
+    (("image_size", get_image_shapes), ("size", get_image_shapes)),
+    (("input_size", lambda value: {"num_channels": value[0], "height": value[1], "width": value[2]}),),
+    # classification labels
+    (("id2label", lambda value: {"num_labels": len(value)}), ("num_classes", get_shape("num_labels"))),
+    # object detection labels
+    (("num_queries", get_shape("num_queries")),),
+    # image-text input
+    (("patch_size", get_shape("patch_size")),),
+    (("in_chans", get_shape("num_channels")),),
+    (("image_seq_len", get_shape("image_seq_len")),),
+    (("image_token_id", get_shape("image_token_id")),),
+    (("spatial_merge_size", get_shape("spatial_merge_size")),),
+    (("do_image_splitting", get_shape("do_image_splitting")),),
+    (("temporal_patch_size", get_shape("temporal_patch_size")),),
+)
+
+
 def extract_transformers_shapes_from_artifacts(
     config: Optional["PretrainedConfig"] = None,
     processor: Optional["PretrainedProcessor"] = None,
@@ -120,77 +364,17 @@ def extract_transformers_shapes_from_artifacts(
     if processor is not None:
         flat_artifacts_dict.update(get_flat_artifact_dict(processor))
 
-    shapes = {}
-
-    # text input
-    if "vocab_size" in flat_artifacts_dict:
-        shapes["vocab_size"] = flat_artifacts_dict["vocab_size"]
-
-    if "type_vocab_size" in flat_artifacts_dict:
-        shapes["type_vocab_size"] = flat_artifacts_dict["type_vocab_size"]
-
-    if "max_position_embeddings" in flat_artifacts_dict:
-        shapes["max_position_embeddings"] = flat_artifacts_dict["max_position_embeddings"]
-    elif "n_positions" in flat_artifacts_dict:
-        shapes["max_position_embeddings"] = flat_artifacts_dict["n_positions"]
+    return extract_shapes_from_flat_artifacts_dict(flat_artifacts_dict)
 
-    # image input
-    if "num_channels" in flat_artifacts_dict:
-        shapes["num_channels"] = flat_artifacts_dict["num_channels"]
-
-    if "image_size" in flat_artifacts_dict:
-        image_size = flat_artifacts_dict["image_size"]
-    elif "size" in flat_artifacts_dict:
-        image_size = flat_artifacts_dict["size"]
-    else:
-        image_size = None
 
-    if isinstance(image_size, (int, float)):
-        shapes["height"] = image_size
-        shapes["width"] = image_size
-    elif isinstance(image_size, (list, tuple)):
-        shapes["height"] = image_size[0]
-        shapes["width"] = image_size[0]
-    elif isinstance(image_size, dict) and len(image_size) == 2:
-        shapes["height"] = list(image_size.values())[0]
-        shapes["width"] = list(image_size.values())[1]
-    elif isinstance(image_size, dict) and len(image_size) == 1:
-        shapes["height"] = list(image_size.values())[0]
-        shapes["width"] = list(image_size.values())[0]
-
-    if "input_size" in flat_artifacts_dict:
-        input_size = flat_artifacts_dict["input_size"]
-        shapes["num_channels"] = input_size[0]
-        shapes["height"] = input_size[1]
-        shapes["width"] = input_size[2]
-
-    # classification labels
-    if "id2label" in flat_artifacts_dict:
-        id2label = flat_artifacts_dict["id2label"]
-        shapes["num_labels"] = len(id2label)
-    elif "num_classes" in flat_artifacts_dict:
-        shapes["num_labels"] = flat_artifacts_dict["num_classes"]
-
-    # object detection labels
-    if "num_queries" in flat_artifacts_dict:
-        shapes["num_queries"] = flat_artifacts_dict["num_queries"]
+def extract_shapes_from_flat_artifacts_dict(flat_artifacts_dict: Dict[str, Any]) -> Dict[str, Any]:
+    shapes = {}
 
-    # image-text input
-    if "patch_size" in flat_artifacts_dict:
-        shapes["patch_size"] = flat_artifacts_dict["patch_size"]
-    if "in_chans" in flat_artifacts_dict:
-        shapes["num_channels"] = flat_artifacts_dict["in_chans"]
-    if "image_seq_len" in flat_artifacts_dict:
-        shapes["image_seq_len"] = flat_artifacts_dict["image_seq_len"]
-    if "image_token_id" in flat_artifacts_dict:
-        shapes["image_token_id"] = flat_artifacts_dict["image_token_id"]
-    if "spatial_merge_size" in flat_artifacts_dict:
-        shapes["spatial_merge_size"] = flat_artifacts_dict["spatial_merge_size"]
-    if "do_image_splitting" in flat_artifacts_dict:
-        shapes["do_image_splitting"] = flat_artifacts_dict["do_image_splitting"]
-
-    if "temporal_patch_size" in flat_artifacts_dict:
-        shapes["temporal_patch_size"] = flat_artifacts_dict["temporal_patch_size"]
+    for alternatives in SHAPES_EXTRACTORS:
+        for key, extractor in alternatives:
+            if key in flat_artifacts_dict:
+                shapes.update(extractor(flat_artifacts_dict[key]))
+                break
 
     return shapes
 
@@ -213,19 +397,19 @@ TORCH_INIT_FUNCTIONS = {
 
 
 def fast_random_tensor(tensor: "Tensor", *args: Any, **kwargs: Any) -> "Tensor":
-    return torch.nn.init.uniform_(tensor)
+    with torch.no_grad():
+        # the in-place method is called directly so that torch.nn.init.uniform_ can be patched as well
+        return tensor.uniform_()
 
 
 @contextmanager
 def fast_weights_init():
     # Replace the initialization functions
-    for name, init_func in TORCH_INIT_FUNCTIONS.items():
-        if name != "uniform_":  # avoid recursion
-            setattr(torch.nn.init, name, fast_random_tensor)
+    for name in TORCH_INIT_FUNCTIONS:
+        setattr(torch.nn.init, name, fast_random_tensor)
     try:
         yield
     finally:
         # Restore the original initialization functions
         for name, init_func in TORCH_INIT_FUNCTIONS.items():
-            if name != "uniform_":  # avoid recursion
-                setattr(torch.nn.init, name, init_func)
+            setattr(torch.nn.init, name, init_func)
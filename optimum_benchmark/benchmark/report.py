@@ -1,4 +1,4 @@
-from dataclasses import dataclass, make_dataclass
+from dataclasses import dataclass, fields, make_dataclass
 from logging import getLogger
 from typing import Any, Dict, List, Optional
 
@@ -99,7 +99,15 @@ class BenchmarkReport(PushToHubMixin):
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "BenchmarkReport":
-        return make_dataclass(cls_name=cls.__name__, fields=data.keys(), bases=(cls,))(**data)
+        return make_dataclass(
+            cls_name=cls.__name__, fields=data.keys(), bases=(cls,), namespace={"_dynamic_report": True}
+        )(**data)
+
+    def __reduce__(self):
+        # reports are dynamically created dataclasses that can't be pickled by reference, so we pickle their targets'
+        # measurements and rebuild them with the from_dict of the (importable) class they were created from
+        report_class = next(cls for cls in type(self).__mro__ if not vars(cls).get("_dynamic_report", False))
+        return (report_class.from_dict, ({target.name: getattr(self, target.name) for target in fields(self)},))
 
     def __post_init__(self):
         for target in self.to_dict().keys():
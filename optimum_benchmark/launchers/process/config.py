@@ -1,4 +1,6 @@
+import os
 from dataclasses import dataclass
+from typing import List, Optional
 
 from ..config import LauncherConfig
 
@@ -9,9 +11,31 @@ class ProcessConfig(LauncherConfig):
     _target_: str = "optimum_benchmark.launchers.process.launcher.ProcessLauncher"
 
     start_method: str = "spawn"
+    # load transformers configs/processors once in the main process and share them with isolated processes,
+    # useful when running many benchmarks (e.g. sweeps) on the same model
+    share_artifacts: bool = False
+    # CPU cores the isolated process (and the threads it spawns) is pinned to, avoids migrations across cores/sockets
+    cpu_affinity: Optional[List[int]] = None
 
     def __post_init__(self):
         super().__post_init__()
 
         if self.start_method not in ["spawn", "fork"]:
             raise ValueError(f"start_method must be one of ['spawn', 'fork'], got {self.start_method}")
+
+        if self.cpu_affinity is not None:
+            if not hasattr(os, "sched_setaffinity"):
+                raise ValueError("cpu_affinity is not supported on this platform")
+
+            available_cpus = os.sched_getaffinity(0)
+            if len(self.cpu_affinity) == 0 or not set(self.cpu_affinity).issubset(available_cpus):
+                raise ValueError(
+                    "cpu_affinity must be a non-empty subset of the CPU(s) available to this process "
+                    f"{sorted(available_cpus)}, got {self.cpu_affinity}"
+                )
+
+            if self.numactl:
+                raise ValueError(
+                    "cpu_affinity and numactl can't be used together, "
+                    "please use numactl_kwargs (e.g. physcpubind) to bind the process to specific cores."
+                )
@@ -1,13 +1,14 @@
 import os
 import traceback
-from contextlib import ExitStack
+from contextlib import ExitStack, contextmanager
 from logging import Logger
 from multiprocessing import Pipe, Process, get_start_method, set_start_method
 from multiprocessing.connection import Connection
-from typing import Any, Callable, List
+from typing import Any, Callable, List, Optional
 
 import psutil
 
+from ...benchmark.config import BenchmarkConfig
 from ...benchmark.report import BenchmarkReport
 from ...logging_utils import setup_logging
 from ...process_utils import sync_with_child, sync_with_parent
@@ -29,14 +30,24 @@ class ProcessLauncher(Launcher[ProcessConfig]):
         child_connection, parent_connection = Pipe()
         main_process_pid = os.getpid()
         isolated_process = Process(
-            target=target, args=(worker, worker_args, child_connection, main_process_pid, self.logger), daemon=False
+            target=target,
+            args=(worker, worker_args, child_connection, main_process_pid, self.config.cpu_affinity, self.logger),
+            daemon=False,
         )
 
         with ExitStack() as stack:
             if self.config.numactl:
                 stack.enter_context(self.numactl_executable())
 
+            if self.config.share_artifacts:
+                stack.enter_context(self.shared_artifacts(worker_args))
+
+            if self.config.cpu_affinity is not None:
+                self.logger.info(f"\t+ Pinning isolated process to CPU(s) {self.config.cpu_affinity}")
+
             isolated_process.start()
+            # only the isolated process should hold the child end, so that a dead child is seen as EOF
+            child_connection.close()
 
             if isolated_process.is_alive():
                 sync_with_child(parent_connection)
@@ -51,14 +62,19 @@ class ProcessLauncher(Launcher[ProcessConfig]):
             else:
                 raise RuntimeError("Could not synchronize with isolated process")
 
+            try:
+                # blocks until the isolated process sends its response, which has to be received
+                # before joining as the isolated process can't exit while its response fills the pipe
+                response = parent_connection.recv()
+            except EOFError:
+                response = None
+
             isolated_process.join()
 
         if isolated_process.exitcode != 0:
             raise RuntimeError(f"Isolated process exited with non-zero code {isolated_process.exitcode}")
 
-        if parent_connection.poll():
-            response = parent_connection.recv()
-        else:
+        if response is None:
             raise RuntimeError("Received no response from isolated process")
 
         if "traceback" in response:
@@ -69,20 +85,56 @@ class ProcessLauncher(Launcher[ProcessConfig]):
             raise ChildProcessError(response["exception"])
         elif "report" in response:
             self.logger.info("\t+ Received report from isolated process")
-            report = BenchmarkReport.from_dict(response["report"])
+            report = response["report"]
         else:
             raise RuntimeError(f"Received an unexpected response from isolated process: {response}")
 
         return report
 
+    @contextmanager
+    def shared_artifacts(self, worker_args: List[Any]):
+        from ...backends.transformers_utils import SHARED_ARTIFACTS_ENV, share_transformers_artifacts
+
+        backend_configs = [arg.backend for arg in worker_args if isinstance(arg, BenchmarkConfig)]
+
+        if len(backend_configs) != 1 or backend_configs[0].library != "transformers":
+            self.logger.info("\t+ Only Transformers models' artifacts can be shared with the isolated process")
+            yield
+            return
+
+        backend_config = backend_configs[0]
+        self.logger.info("\t+ Sharing Transformers artifacts with the isolated process")
+        name = share_transformers_artifacts(
+            backend_config.model,
+            backend_config.processor,
+            backend_config.model_kwargs,
+            backend_config.processor_kwargs,
+        )
+
+        if name is None:
+            yield
+            return
+
+        os.environ[SHARED_ARTIFACTS_ENV] = name
+
+        try:
+            yield
+        finally:
+            os.environ.pop(SHARED_ARTIFACTS_ENV, None)
+
 
 def target(
     worker: Callable[..., BenchmarkReport],
     worker_args: List[Any],
     child_connection: Connection,
     main_process_pid: int,
+    cpu_affinity: Optional[List[int]],
     logger: Logger,
 ) -> None:
+    if cpu_affinity is not None:
+        # set first thing in the isolated process, by itself, so that every thread it spawns afterwards inherits it
+        os.sched_setaffinity(0, cpu_affinity)
+
     main_process = psutil.Process(main_process_pid)
 
     if main_process.is_running():
@@ -106,7 +158,7 @@ def target(
         child_connection.send({"traceback": traceback.format_exc()})
     else:
         logger.info("\t+ Sending report to main process")
-        child_connection.send({"report": report.to_dict()})
+        child_connection.send({"report": report})
     finally:
         logger.info("\t+ Exiting isolated process")
         child_connection.close()
@@ -57,6 +57,8 @@ class TorchrunLauncher(Launcher[TorchrunConfig]):
                 stack.enter_context(self.numactl_executable())
 
             isolated_process.start()
+            # only the isolated process should hold the child end, so that a dead child is seen as EOF
+            child_connection.close()
 
             if isolated_process.is_alive():
                 sync_with_child(parent_connection)
@@ -71,14 +73,19 @@ class TorchrunLauncher(Launcher[TorchrunConfig]):
             else:
                 raise RuntimeError("Could not synchronize with isolated process")
 
+            try:
+                # blocks until the isolated process sends its response, which has to be received
+                # before joining as the isolated process can't exit while its response fills the pipe
+                response = parent_connection.recv()
+            except EOFError:
+                response = None
+
             isolated_process.join()
 
         if isolated_process.exitcode != 0:
             raise RuntimeError(f"Isolated process exited with non-zero code {isolated_process.exitcode}")
 
-        if parent_connection.poll():
-            response = parent_connection.recv()
-        else:
+        if response is None:
             raise RuntimeError("Isolated process did not send any response")
 
         reports = []
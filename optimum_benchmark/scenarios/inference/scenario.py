@@ -278,7 +278,7 @@ class InferenceScenario(Scenario[InferenceConfig]):
 
         prefill_kwargs = {**self.config.generate_kwargs, **TEXT_GENERATION_PREFILL_OVERRIDES}
 
-        with self.latency_tracker.session():
+        with self.latency_tracker.session(expected_runs=self.config.iterations):
             while (
                 self.latency_tracker.elapsed() < self.config.duration
                 or self.latency_tracker.count() < self.config.iterations
@@ -293,7 +293,7 @@ class InferenceScenario(Scenario[InferenceConfig]):
             prefill_latency, self.atomic_prefill_volume, unit=PREFILL_THROUGHPUT_UNIT
         )
 
-        with self.latency_tracker.session():
+        with self.latency_tracker.session(expected_runs=self.config.iterations):
             while (
                 self.latency_tracker.elapsed() < self.config.duration
                 or self.latency_tracker.count() < self.config.iterations
@@ -333,7 +333,7 @@ class InferenceScenario(Scenario[InferenceConfig]):
     def run_inference_latency_tracking(self):
         self.logger.info("\t+ Running Inference latency tracking")
 
-        with self.latency_tracker.session():
+        with self.latency_tracker.session(expected_runs=self.config.iterations):
             while (
                 self.latency_tracker.elapsed() < self.config.duration
                 or self.latency_tracker.count() < self.config.iterations
@@ -45,23 +45,80 @@ TASKS_TO_AUTO_PIPELINE_CLASS_NAMES = {
     "image-to-image": "AutoPipelineForImage2Image",
 }
 
-TASKS_TO_MODEL_TYPES_TO_MODEL_CLASS_NAMES = {}
 
-if is_transformers_available() and is_torch_available():
-    import transformers
+class _LazyTaskMap(dict):
+    """
+    Maps a task to its model types and model class names, resolving the task's auto model mappings on first access
+    """
 
-    for task_name, auto_model_class_names in TASKS_TO_AUTO_MODEL_CLASS_NAMES.items():
-        TASKS_TO_MODEL_TYPES_TO_MODEL_CLASS_NAMES[task_name] = {}
+    def __missing__(self, task_name: str):
+        if task_name not in TASKS_TO_AUTO_MODEL_CLASS_NAMES or not (
+            is_transformers_available() and is_torch_available()
+        ):
+            raise KeyError(task_name)
+
+        import transformers
+
+        auto_model_class_names = TASKS_TO_AUTO_MODEL_CLASS_NAMES[task_name]
 
         if isinstance(auto_model_class_names, str):
             auto_model_class_names = (auto_model_class_names,)
 
+        model_mapping = {}
         for auto_model_class_name in auto_model_class_names:
             auto_model_class = getattr(transformers, auto_model_class_name, None)
             if auto_model_class is not None:
-                TASKS_TO_MODEL_TYPES_TO_MODEL_CLASS_NAMES[task_name].update(
-                    auto_model_class._model_mapping._model_mapping
-                )
+                model_mapping.update(auto_model_class._model_mapping._model_mapping)
+
+        self[task_name] = model_mapping
+
+        return model_mapping
+
+    def get(self, task_name: str, default=None):
+        # dict.get bypasses __missing__
+        try:
+            return self[task_name]
+        except KeyError:
+            return default
+
+    def _resolve_all(self) -> None:
+        # iterating the map (or checking its size) needs every task, like the eagerly built dict it replaces
+        for task_name in TASKS_TO_AUTO_MODEL_CLASS_NAMES:
+            self.get(task_name)
+
+    def __contains__(self, task_name: str) -> bool:
+        return self.get(task_name) is not None
+
+    def __iter__(self):
+        self._resolve_all()
+        return super().__iter__()
+
+    def __len__(self) -> int:
+        self._resolve_all()
+        return super().__len__()
+
+    def __repr__(self) -> str:
+        self._resolve_all()
+        return super().__repr__()
+
+    def keys(self):
+        self._resolve_all()
+        return super().keys()
+
+    def values(self):
+        self._resolve_all()
+        return super().values()
+
+    def items(self):
+        self._resolve_all()
+        return super().items()
+
+    def copy(self):
+        self._resolve_all()
+        return dict(super().items())
+
+
+TASKS_TO_MODEL_TYPES_TO_MODEL_CLASS_NAMES = _LazyTaskMap()
 
 
 TASKS_TO_PIPELINE_TYPES_TO_PIPELINE_CLASS_NAMES = {}
@@ -259,7 +316,8 @@ def infer_task_from_model_name_or_path(
         )
         target_class_name = transformers_config["architectures"][0]
 
-        for task_name, model_mapping in TASKS_TO_MODEL_TYPES_TO_MODEL_CLASS_NAMES.items():
+        for task_name in TASKS_TO_AUTO_MODEL_CLASS_NAMES:
+            model_mapping = TASKS_TO_MODEL_TYPES_TO_MODEL_CLASS_NAMES.get(task_name, {})
             for _, model_class_name in model_mapping.items():
                 if target_class_name == model_class_name:
                     inferred_task_name = task_name
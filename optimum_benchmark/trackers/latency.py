@@ -1,7 +1,7 @@
-import time
 from contextlib import contextmanager
 from dataclasses import asdict, dataclass
 from logging import getLogger
+from time import perf_counter
 from typing import List, Literal, Optional, Union
 
 import numpy as np
@@ -61,7 +61,7 @@ class Latency:
             raise ValueError("Some latency measurements are missing")
 
         # we combine the lists of latencies and statistics are then computed on this list
-        values = sum((lat.values for lat in latencies), [])
+        values = np.concatenate([np.asarray(lat.values, dtype=np.float64) for lat in latencies]).tolist()
 
         unit = latencies[0].unit
 
@@ -69,18 +69,24 @@ class Latency:
 
     @staticmethod
     def from_values(values: List[float], unit: str) -> "Latency":
+        # converting once to an array avoids re-converting the list in every numpy call
+        array = np.asarray(values, dtype=np.float64)
+        mean = array.mean()
+        stdev = array.std() if array.size > 1 else 0
+        p50, p90, p95, p99 = np.percentile(array, [50, 90, 95, 99])
+
         return Latency(
             unit=unit,
             values=values,
-            count=len(values),
-            total=sum(values),
-            mean=np.mean(values),
-            p50=np.percentile(values, 50),
-            p90=np.percentile(values, 90),
-            p95=np.percentile(values, 95),
-            p99=np.percentile(values, 99),
-            stdev=np.std(values) if len(values) > 1 else 0,
-            stdev_=(np.std(values) / np.abs(np.mean(values))) * 100 if len(values) > 1 else 0,
+            count=array.size,
+            total=array.sum(),
+            mean=mean,
+            p50=p50,
+            p90=p90,
+            p95=p95,
+            p99=p99,
+            stdev=stdev,
+            stdev_=(stdev / np.abs(mean)) * 100 if array.size > 1 else 0,
         )
 
     def to_plain_text(self) -> str:
@@ -134,7 +140,7 @@ class Throughput:
             raise ValueError("Some throughput measurements are missing")
 
         # we compute throughputs on the whole input level so we just take the average
-        value = sum(throughput.value for throughput in throughputs) / len(throughputs)
+        value = float(np.mean([throughput.value for throughput in throughputs]))
         unit = throughputs[0].unit
 
         return Throughput(value=value, unit=unit)
@@ -190,9 +196,9 @@ class LatencyTracker:
             yield
             self.end_event.record()
         else:
-            self.start_event = time.perf_counter()
+            self.start_event = perf_counter()
             yield
-            self.end_event = time.perf_counter()
+            self.end_event = perf_counter()
 
     def get_latency(self) -> Latency:
         assert self.start_event is not None and self.end_event is not None
@@ -222,17 +228,28 @@ class LatencySessionTracker:
 
         self.start_events: List[Union[float, torch.cuda.Event]] = []
         self.end_events: List[Union[float, torch.cuda.Event]] = []
+        self.num_runs: int = 0
 
         self.start_time: Optional[float] = None
 
     @contextmanager
-    def session(self):
+    def session(self, expected_runs: int = 0):
         assert self.start_time is None
 
-        self.start_events = []
-        self.end_events = []
+        # preallocating the expected number of runs avoids growing the lists inside the measurement loop
+        if self.is_pytorch_cuda:
+            # cuda events are pooled and reused across sessions, creating one is a driver call we
+            # don't want to make inside the measurement loop
+            num_missing_events = max(expected_runs - len(self.start_events), 0)
+            self.start_events += [torch.cuda.Event(enable_timing=True) for _ in range(num_missing_events)]
+            self.end_events += [torch.cuda.Event(enable_timing=True) for _ in range(num_missing_events)]
+        else:
+            self.start_events = [0.0] * expected_runs
+            self.end_events = [0.0] * expected_runs
+
+        self.num_runs = 0
 
-        self.start_time = time.perf_counter()
+        self.start_time = perf_counter()
         yield
         self.start_time = None
 
@@ -240,43 +257,53 @@ class LatencySessionTracker:
         assert self.start_time is not None, "This method can only be called inside of a '.session()' context"
         assert len(self.start_events) == len(self.end_events)
 
-        return len(self.start_events)
+        return self.num_runs
 
     def elapsed(self):
         assert self.start_time is not None, "This method can only be called inside of a '.session()' context"
 
-        return time.perf_counter() - self.start_time
+        return perf_counter() - self.start_time
 
     @contextmanager
     def track(self):
         if self.is_pytorch_cuda:
-            start_event = torch.cuda.Event(enable_timing=True)
-            end_event = torch.cuda.Event(enable_timing=True)
+            if self.num_runs < len(self.start_events):
+                start_event = self.start_events[self.num_runs]
+                end_event = self.end_events[self.num_runs]
+            else:
+                start_event = torch.cuda.Event(enable_timing=True)
+                end_event = torch.cuda.Event(enable_timing=True)
 
             start_event.record()
             yield
             end_event.record()
         else:
-            start_event = time.perf_counter()
+            start_event = perf_counter()
             yield
-            end_event = time.perf_counter()
+            end_event = perf_counter()
 
-        self.start_events.append(start_event)
-        self.end_events.append(end_event)
+        if self.num_runs < len(self.start_events):
+            self.start_events[self.num_runs] = start_event
+            self.end_events[self.num_runs] = end_event
+        else:
+            self.start_events.append(start_event)
+            self.end_events.append(end_event)
+
+        self.num_runs += 1
 
     def get_latency(self) -> Latency:
-        assert len(self.end_events) == len(self.start_events) >= 0
+        assert len(self.end_events) == len(self.start_events) >= self.num_runs
+
+        start_events = self.start_events[: self.num_runs]
+        end_events = self.end_events[: self.num_runs]
 
         if self.is_pytorch_cuda:
             torch.cuda.synchronize()
             latencies = [
-                start_event.elapsed_time(end_event) / 1e3
-                for start_event, end_event in zip(self.start_events, self.end_events)
+                start_event.elapsed_time(end_event) / 1e3 for start_event, end_event in zip(start_events, end_events)
             ]
         else:
-            latencies = [
-                (end_event - start_event) for start_event, end_event in zip(self.start_events, self.end_events)
-            ]
+            latencies = (np.asarray(end_events) - np.asarray(start_events)).tolist()
 
         assert all(latency >= 0 for latency in latencies), (
             "Found some negative latencies while performing substraction. "
@@ -320,7 +347,7 @@ class PerTokenLatencySessionTrackerLogitsProcessor:
         self.decode_start_events = []
         self.decode_end_events = []
 
-        self.start_time = time.perf_counter()
+        self.start_time = perf_counter()
         yield
         self.start_time = None
 
@@ -338,7 +365,7 @@ class PerTokenLatencySessionTrackerLogitsProcessor:
     def elapsed(self):
         assert self.start_time is not None, "This method can only be called inside of a '.session()' context"
 
-        return time.perf_counter() - self.start_time
+        return perf_counter() - self.start_time
 
     @contextmanager
     def track(self):
@@ -350,9 +377,9 @@ class PerTokenLatencySessionTrackerLogitsProcessor:
             yield
             end_event.record()
         else:
-            start_event = time.perf_counter()
+            start_event = perf_counter()
             yield
-            end_event = time.perf_counter()
+            end_event = perf_counter()
 
         self.prefill_start_events.append(start_event)
         self.decode_end_events.append(end_event)
@@ -365,7 +392,7 @@ class PerTokenLatencySessionTrackerLogitsProcessor:
             event = torch.cuda.Event(enable_timing=True)
             event.record()
         else:
-            event = time.perf_counter()
+            event = perf_counter()
 
         if len(self.prefill_start_events) == len(self.prefill_end_events):
             # on the first call (prefill), there will be the same number of prefill/decode start/end events
@@ -478,7 +505,7 @@ class PerStepLatencySessionTrackerPipelineCallback:
         self.per_step_end_events = []
         self.per_step_events = []
 
-        self.start_time = time.perf_counter()
+        self.start_time = perf_counter()
         yield
         self.start_time = None
 
@@ -491,7 +518,7 @@ class PerStepLatencySessionTrackerPipelineCallback:
     def elapsed(self):
         assert self.start_time is not None, "This method can only be called inside of a '.session()' context"
 
-        return time.perf_counter() - self.start_time
+        return perf_counter() - self.start_time
 
     @contextmanager
     def track(self):
@@ -503,9 +530,9 @@ class PerStepLatencySessionTrackerPipelineCallback:
             yield
             end_event.record()
         else:
-            start_event = time.perf_counter()
+            start_event = perf_counter()
             yield
-            end_event = time.perf_counter()
+            end_event = perf_counter()
 
         self.call_start_events.append(start_event)
         self.call_end_events.append(end_event)
@@ -518,7 +545,7 @@ class PerStepLatencySessionTrackerPipelineCallback:
             event = torch.cuda.Event(enable_timing=True)
             event.record()
         else:
-            event = time.perf_counter()
+            event = perf_counter()
 
         self.per_step_events.append(event)
 
@@ -591,7 +618,7 @@ class StepLatencyTrackerTrainerCallback(TrainerCallback):
             event = torch.cuda.Event(enable_timing=True)
             event.record()
         else:
-            event = time.perf_counter()
+            event = perf_counter()
 
         self.start_events.append(event)
 
@@ -600,7 +627,7 @@ class StepLatencyTrackerTrainerCallback(TrainerCallback):
             event = torch.cuda.Event(enable_timing=True)
             event.record()
         else:
-            event = time.perf_counter()
+            event = perf_counter()
 
         self.end_events.append(event)
 
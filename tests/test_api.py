@@ -1,17 +1,33 @@
 import gc
 import os
+import pickle
+import sys
 import time
 from importlib import reload
 from tempfile import TemporaryDirectory
+from types import SimpleNamespace
 
 import pandas as pd
 import pytest
 import torch
 
-from optimum_benchmark import Benchmark, BenchmarkConfig, InferenceConfig, ProcessConfig, PyTorchConfig, TrainingConfig
+from optimum_benchmark import (
+    Benchmark,
+    BenchmarkConfig,
+    BenchmarkReport,
+    InferenceConfig,
+    ProcessConfig,
+    PyTorchConfig,
+    TrainingConfig,
+)
+from optimum_benchmark.backends.transformers_utils import (
+    extract_shapes_from_flat_artifacts_dict,
+    extract_transformers_shapes_from_artifacts,
+)
 from optimum_benchmark.import_utils import get_git_revision_hash
 from optimum_benchmark.system_utils import is_nvidia_system, is_rocm_system
-from optimum_benchmark.trackers import LatencySessionTracker, MemoryTracker
+from optimum_benchmark.task_utils import TASKS_TO_AUTO_MODEL_CLASS_NAMES, TASKS_TO_MODEL_TYPES_TO_MODEL_CLASS_NAMES
+from optimum_benchmark.trackers import Latency, LatencySessionTracker, Memory, MemoryTracker, Throughput
 
 PUSH_REPO_ID = os.environ.get("PUSH_REPO_ID", "optimum-benchmark/local")
 
@@ -34,6 +50,25 @@ DATASET_SHAPES = {
     "num_choices": 2,  # for multiple-choice task
 }
 
+SHAPES_PRECEDENCE_CASES = [
+    # image_size takes precedence over size, even when it can't be used
+    ({"image_size": 32, "size": 64}, {"height": 32, "width": 32}),
+    ({"image_size": None, "size": 64}, {}),
+    ({"size": [64, 48]}, {"height": 64, "width": 64}),
+    ({"image_size": {"height": 64, "width": 48}}, {"height": 64, "width": 48}),
+    # input_size overrides num_channels, height and width
+    ({"num_channels": 3, "image_size": 32, "input_size": [1, 16, 24]}, {"num_channels": 1, "height": 16, "width": 24}),
+    # in_chans overrides num_channels, including the one from input_size
+    ({"num_channels": 3, "in_chans": 4}, {"num_channels": 4}),
+    ({"input_size": [1, 16, 24], "in_chans": 4}, {"num_channels": 4, "height": 16, "width": 24}),
+    # id2label takes precedence over num_classes
+    ({"id2label": {0: "a", 1: "b", 2: "c"}, "num_classes": 10}, {"num_labels": 3}),
+    ({"num_classes": 10}, {"num_labels": 10}),
+    # max_position_embeddings takes precedence over n_positions
+    ({"max_position_embeddings": 512, "n_positions": 128}, {"max_position_embeddings": 512}),
+    ({"n_positions": 128}, {"max_position_embeddings": 128}),
+]
+
 
 @pytest.mark.parametrize("device", ["cpu", "cuda"])
 @pytest.mark.parametrize("scenario", ["training", "inference"])
@@ -161,6 +196,38 @@ def test_api_push_to_hub_mixin():
         assert from_hub_artifact.to_dict() == artifact.to_dict()
 
 
+@pytest.mark.parametrize("flat_artifacts_dict,expected_shapes", SHAPES_PRECEDENCE_CASES)
+def test_api_shapes_extraction_precedence(flat_artifacts_dict, expected_shapes):
+    assert extract_shapes_from_flat_artifacts_dict(flat_artifacts_dict) == expected_shapes
+
+
+def test_api_shapes_extraction_from_artifacts():
+    # artifacts' None attributes are dropped before extraction, so size is used instead of an unset image_size
+    processor = SimpleNamespace(image_size=None, size=64, num_channels=3)
+    assert extract_transformers_shapes_from_artifacts(processor=processor) == {
+        "num_channels": 3,
+        "height": 64,
+        "width": 64,
+    }
+
+
+def test_api_benchmark_report_pickle():
+    # reports are sent from the isolated process to the main process as pickled objects
+    report = BenchmarkReport.from_list(["load", "forward"])
+    report.load.memory = Memory(unit="MB", max_ram=1024.0)
+    report.forward.latency = Latency.from_values([0.1, 0.2, 0.3], unit="s")
+    report.forward.throughput = Throughput.from_latency(report.forward.latency, volume=2, unit="samples/s")
+
+    unpickled_report = pickle.loads(pickle.dumps(report))
+    assert unpickled_report.to_dict() == report.to_dict()
+
+    report = BenchmarkReport.from_dict({"decode": {"latency": Latency.from_values([0.5], unit="s")}})
+
+    unpickled_report = pickle.loads(pickle.dumps(report))
+    assert unpickled_report.to_dict() == report.to_dict()
+    assert isinstance(unpickled_report, BenchmarkReport)
+
+
 @pytest.mark.parametrize("device", ["cpu", "cuda"])
 @pytest.mark.parametrize("backend", ["pytorch", "other"])
 def test_api_latency_tracker(device, backend):
@@ -190,6 +257,18 @@ def test_api_latency_tracker(device, backend):
     assert latency.mean > 0.9
     assert len(latency.values) == 2
 
+    with tracker.session(expected_runs=1):
+        while tracker.count() < 2:
+            with tracker.track():
+                time.sleep(1)
+
+    latency = tracker.get_latency()
+    latency.log()
+
+    assert latency.mean < 1.1
+    assert latency.mean > 0.9
+    assert len(latency.values) == 2
+
 
 @pytest.mark.parametrize("device", ["cpu", "cuda"])
 @pytest.mark.parametrize("backend", ["pytorch", "other"])
@@ -245,5 +324,26 @@ def test_api_memory_tracker(device, backend):
     gc.collect()
 
 
+def test_api_cpu_affinity_validation():
+    if sys.platform != "linux":
+        pytest.skip("cpu_affinity is only tested on Linux")
+
+    available_cpus = os.sched_getaffinity(0)
+
+    with pytest.raises(ValueError, match="cpu_affinity and numactl can't be used together"):
+        ProcessConfig(numactl=True, cpu_affinity=[min(available_cpus)])
+
+    with pytest.raises(ValueError, match="cpu_affinity must be a non-empty subset"):
+        ProcessConfig(cpu_affinity=[max(available_cpus) + 1])
+
+
+def test_api_tasks_to_model_types_to_model_class_names():
+    # resolved lazily, but iterating it still exposes every task
+    assert "fill-mask" in TASKS_TO_MODEL_TYPES_TO_MODEL_CLASS_NAMES
+    assert len(TASKS_TO_MODEL_TYPES_TO_MODEL_CLASS_NAMES) == len(TASKS_TO_AUTO_MODEL_CLASS_NAMES)
+    assert set(TASKS_TO_MODEL_TYPES_TO_MODEL_CLASS_NAMES.keys()) == set(TASKS_TO_AUTO_MODEL_CLASS_NAMES.keys())
+    assert "bert" in dict(TASKS_TO_MODEL_TYPES_TO_MODEL_CLASS_NAMES.items())["fill-mask"]
+
+
 def test_git_revision_hash_detection():
     assert get_git_revision_hash("optimum_benchmark") is not None
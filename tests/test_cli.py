@@ -127,3 +127,74 @@ def test_cli_numactl(launcher):
 
     popen = run_subprocess_and_log_stream_output(LOGGER, args)
     assert popen.returncode == 0
+
+
+def test_cli_no_weights_remote_code():
+    args = [
+        "optimum-benchmark",
+        "--config-dir",
+        TEST_CONFIG_DIR,
+        "--config-name",
+        "_base_",
+        "name=test",
+        "launcher=process",
+        # a model whose config and modeling code live in its hub repo
+        "backend.model=hf-internal-testing/test_dynamic_model",
+        "backend.task=feature-extraction",
+        "backend.device=cpu",
+        "backend.no_weights=true",
+        "+backend.model_kwargs.trust_remote_code=true",
+        # input shapes
+        "+scenario.input_shapes.batch_size=1",
+        "+scenario.input_shapes.sequence_length=16",
+    ]
+
+    popen = run_subprocess_and_log_stream_output(LOGGER, args)
+    assert popen.returncode == 0
+
+
+def test_cli_share_artifacts():
+    args = [
+        "optimum-benchmark",
+        "--config-dir",
+        TEST_CONFIG_DIR,
+        "--config-name",
+        "_base_",
+        "name=test",
+        "launcher=process",
+        "launcher.share_artifacts=True",
+        "backend.model=google-bert/bert-base-uncased",
+        "backend.task=text-classification",
+        "backend.device=cpu",
+        # input shapes
+        "+scenario.input_shapes.batch_size=1",
+        "+scenario.input_shapes.sequence_length=16",
+    ]
+
+    popen = run_subprocess_and_log_stream_output(LOGGER, args)
+    assert popen.returncode == 0
+
+
+def test_cli_cpu_affinity():
+    if sys.platform != "linux":
+        pytest.skip("cpu_affinity is only tested on Linux")
+
+    args = [
+        "optimum-benchmark",
+        "--config-dir",
+        TEST_CONFIG_DIR,
+        "--config-name",
+        "_base_",
+        "name=test",
+        "launcher=process",
+        "launcher.cpu_affinity=[0]",
+        "backend.model=google-bert/bert-base-uncased",
+        "backend.task=text-classification",
+        "backend.device=cpu",
+        # input shapes
+        "+scenario.input_shapes.batch_size=1",
+        "+scenario.input_shapes.sequence_length=16",
+    ]
+
+    popen = run_subprocess_and_log_stream_output(LOGGER, args)
+    assert popen.returncode == 0